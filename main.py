@@ -11,21 +11,82 @@ File Workflow:
 4. Reports sets of duplicate files
 
 Directory Workflow:
-1. Scans all directories
+1. Groups the files from the same walk by parent directory
 2. Analyzes directory contents (file names, sizes, hashes)
 3. Compares directory signatures
 4. Reports directories with identical contents
 """
 
+import os
 import sys
+import mmap
+import queue
+import threading
 import hashlib
 import argparse
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 
+import xxhash
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+# Content hash algorithms (name -> hasher constructor). Duplicate detection doesn't
+# need a cryptographic hash, so the much faster xxh3_128 is the default; md5 is
+# kept for reproducing file hashes of earlier runs (directory signatures differ).
+HASH_ALGORITHMS: Dict[str, Callable[..., Any]] = {
+    'xxh3': xxhash.xxh3_128,
+    'md5': hashlib.md5,
+}
+# BLAKE3 (optional dependency): SIMD and multi-threaded within a single large file
+if blake3 is not None:
+    HASH_ALGORITHMS['blake3'] = partial(blake3.blake3, max_threads=blake3.blake3.AUTO)
+DEFAULT_HASH_ALGO: str = 'xxh3'
+
+# Files up to this size are read in one call instead of streamed
+SMALL_FILE_THRESHOLD: int = 64 * 1024
+# Files above this size are memory-mapped and hashed straight from the page cache
+MMAP_THRESHOLD: int = 1024 * 1024
+# Amount of a mapped file fed to the hasher per update() call
+MMAP_SLICE_SIZE: int = 16 * 1024 * 1024
+# Read buffer for streamed hashing when hashlib.file_digest is unavailable (< 3.11)
+READ_BUFFER_SIZE: int = 1024 * 1024
+# Number of leading and trailing bytes compared before a file is hashed in full
+PARTIAL_HASH_SIZE: int = 4096
+# Same-size groups of files up to this size skip the partial hash and are hashed in full
+PARTIAL_HASH_MIN_SIZE: int = 64 * 1024
+# Walking/hashing threads; oversubscribed so I/O waits overlap (hashlib releases the GIL)
+DEFAULT_WORKERS: int = (os.cpu_count() or 1) * 2
+# Hashing tasks kept in flight per worker, so pending futures don't pile up in memory
+QUEUE_DEPTH_PER_WORKER: int = 4
+
+# Paths of equal-sized files keyed by (st_dev, st_ino): hardlinks share one entry
+InodeGroups = Dict[Tuple[int, int], List[str]]
+# A file to hash: (size, (st_dev, st_ino), hardlinked paths)
+HashCandidate = Tuple[int, Tuple[int, int], List[str]]
+
+
+@dataclass
+class FileEntry:
+    """
+    A regular file found while walking the directory tree.
+    Paths are kept as the strings os.scandir returns; Path objects are only built
+    for reported duplicates.
+    """
+    path: str
+    name: str
+    size: int
+    device: int
+    inode: int
+
 
 @dataclass
 class DuplicateItem:
@@ -68,142 +129,396 @@ def setup_logging(verbose: bool = False) -> None:
     )
 
 
-def calculate_file_hash(file_path: Path, chunk_size: int = 8192) -> str:
-    """Calculate MD5 hash of a file."""
-    hash_md5 = hashlib.md5()
+def hash_mapped_file(f: BinaryIO, hash_algo: str = DEFAULT_HASH_ALGO) -> bytes:
+    """
+    Calculate the digest of an open file through a read-only memory map.
+    Returns empty bytes if the file cannot be mapped (e.g. files in /proc).
+    """
+    try:
+        mm: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return b""
+
+    hasher = HASH_ALGORITHMS[hash_algo]()
+    with mm:
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for offset in range(0, len(view), MMAP_SLICE_SIZE):
+                hasher.update(view[offset:offset + MMAP_SLICE_SIZE])
+    return hasher.digest()
+
+
+def digest_file(f: BinaryIO, hash_algo: str = DEFAULT_HASH_ALGO) -> bytes:
+    """
+    Calculate the digest of an open file by streaming it through the hasher.
+    Uses hashlib.file_digest where available (Python 3.11+), otherwise reads into
+    one reused buffer instead of allocating a new bytes object per chunk.
+    """
+    if hasattr(hashlib, 'file_digest'):
+        return hashlib.file_digest(f, HASH_ALGORITHMS[hash_algo]).digest()
+    
+    hasher = HASH_ALGORITHMS[hash_algo]()
+    buffer: bytearray = bytearray(READ_BUFFER_SIZE)
+    with memoryview(buffer) as view:
+        while True:
+            size: int = f.readinto(buffer)
+            if not size:
+                break
+            hasher.update(view[:size])
+    return hasher.digest()
+
+
+def calculate_file_hash(file_path: str, hash_algo: str = DEFAULT_HASH_ALGO) -> bytes:
+    """
+    Calculate the raw content digest of a file (empty bytes if it can't be read).
+    Small files are hashed from a single read, large files are memory-mapped and
+    everything in between is streamed through digest_file.
+    """
     try:
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        with open(file_path, 'rb', buffering=0) as f:
+            file_size: int = os.fstat(f.fileno()).st_size
+            if file_size <= SMALL_FILE_THRESHOLD:
+                return HASH_ALGORITHMS[hash_algo](f.read()).digest()
+            if file_size > MMAP_THRESHOLD:
+                file_hash: bytes = hash_mapped_file(f, hash_algo)
+                if file_hash:
+                    return file_hash
+            return digest_file(f, hash_algo)
     except (IOError, OSError) as e:
         logging.warning(f"Could not read file {file_path}: {e}")
-        return ""
+        return b""
 
 
-def walk_directory_tree_and_group_by_size(root_path: Path) -> Dict[int, List[Path]]:
+def calculate_partial_hash(file_path: str) -> bytes:
     """
-    Walk the directory tree and directly group files by size.
-    Returns a dictionary mapping file_size -> list of file paths.
+    Calculate a cheap xxh3_64 digest of the first and last PARTIAL_HASH_SIZE bytes
+    of a file. Only meant for files larger than twice PARTIAL_HASH_SIZE.
     """
-    size_groups: Dict[int, List[Path]] = defaultdict(list)
-    
     try:
-        for file_path in root_path.rglob('*'):
-            if file_path.is_file():
-                try:
-                    file_size: int = file_path.stat().st_size
-                    size_groups[file_size].append(file_path)
-                except (OSError, FileNotFoundError) as e:
-                    logging.warning(f"Could not get size for {file_path}: {e}")
-    except (OSError, PermissionError) as e:
-        logging.error(f"Error accessing directory {root_path}: {e}")
+        with open(file_path, 'rb', buffering=0) as f:
+            hasher = xxhash.xxh3_64(f.read(PARTIAL_HASH_SIZE))
+            f.seek(-PARTIAL_HASH_SIZE, os.SEEK_END)
+            hasher.update(f.read(PARTIAL_HASH_SIZE))
+            return hasher.digest()
+    except (IOError, OSError) as e:
+        logging.warning(f"Could not read file {file_path}: {e}")
+        return b""
+
+
+def fast_walk(root_path: Path, workers: int = DEFAULT_WORKERS) -> List[FileEntry]:
+    """
+    Walk the directory tree with a pool of threads sharing one queue of directories.
+    Each thread lists directories with os.scandir, queues their subdirectories and
+    collects regular files in its own list; the lists are merged after the walk.
+    Symlinks are not followed, which also keeps the walk free of cycles.
+    Returns the files sorted by path.
+    """
+    directories: "queue.Queue[Optional[str]]" = queue.Queue()
+    directories.put(str(root_path))
+    thread_results: List[List[FileEntry]] = []
+    
+    def worker() -> None:
+        files: List[FileEntry] = []
+        thread_results.append(files)
+        while True:
+            directory: Optional[str] = directories.get()
+            if directory is None:
+                break
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.put(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            try:
+                                stat_result: os.stat_result = entry.stat(follow_symlinks=False)
+                            except (OSError, FileNotFoundError) as e:
+                                logging.warning(f"Could not get size for {entry.path}: {e}")
+                                continue
+                            files.append(FileEntry(
+                                path=entry.path,
+                                name=entry.name,
+                                size=stat_result.st_size,
+                                device=stat_result.st_dev,
+                                inode=stat_result.st_ino
+                            ))
+            except (OSError, PermissionError) as e:
+                logging.warning(f"Could not access directory {directory}: {e}")
+            finally:
+                directories.task_done()
+    
+    threads: List[threading.Thread] = [
+        threading.Thread(target=worker, daemon=True) for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    # Subdirectories are queued before their parent is marked done, so join()
+    # only returns once the whole tree has been listed
+    directories.join()
+    for _ in threads:
+        directories.put(None)
+    for thread in threads:
+        thread.join()
+    
+    files: List[FileEntry] = [entry for files in thread_results for entry in files]
+    files.sort(key=lambda entry: entry.path)
+    return files
+
+
+def group_files_by_size(files: List[FileEntry]) -> Dict[int, InodeGroups]:
+    """
+    Group walked files by size, keeping only sizes shared by two or more paths.
+    Returns a dictionary mapping file_size -> (st_dev, st_ino) -> list of file paths,
+    so hardlinks to the same inode end up in one list.
+    """
+    # Count first so files with a unique size (usually most) never get a group
+    size_counts: Counter = Counter(entry.size for entry in files)
+    size_groups: Dict[int, InodeGroups] = defaultdict(lambda: defaultdict(list))
+    
+    for entry in files:
+        if size_counts[entry.size] > 1:
+            size_groups[entry.size][(entry.device, entry.inode)].append(entry.path)
     
     return size_groups
 
 
-def find_duplicates_by_hash(size_groups: Dict[int, List[Path]]) -> List[DuplicateSet]:
-    """Hash files of equal size and group by hash to find duplicates."""
-    duplicate_sets: List[DuplicateSet] = []
+def group_files_by_directory(
+    files: List[FileEntry],
+    root_path: Path
+) -> Dict[str, List[FileEntry]]:
+    """
+    Group walked files by their parent directory.
+    The root itself is left out, only its subdirectories are compared.
+    """
+    directory_files: Dict[str, List[FileEntry]] = defaultdict(list)
+    root: str = str(root_path)
     
-    for size, file_paths in size_groups.items():
-        # Skip single files - they can't be duplicates by size
-        if len(file_paths) < 2:
-            continue
-            
-        logging.info(f"Hashing {len(file_paths)} files of size {size:,} bytes...")
-        
-        hash_groups: Dict[str, List[Path]] = defaultdict(list)
-        for file_path in file_paths:
-            file_hash: str = calculate_file_hash(file_path)
+    for entry in files:
+        parent: str = os.path.dirname(entry.path)
+        if parent != root:
+            directory_files[parent].append(entry)
+    
+    return directory_files
+
+
+def count_paths(inode_groups: InodeGroups) -> int:
+    """Number of paths in a size group, counting every hardlink."""
+    return sum(len(paths) for paths in inode_groups.values())
+
+
+def bounded_map(
+    executor: Executor,
+    func: Callable[[HashCandidate], bytes],
+    items: Iterable[HashCandidate],
+    max_pending: int
+) -> Iterator[Tuple[HashCandidate, bytes]]:
+    """
+    Run func over items with at most max_pending calls in flight, yielding
+    (item, result) pairs in completion order. The window is topped up as soon as
+    any call finishes, so one slow call doesn't stall the others.
+    """
+    pending: Dict[Future, HashCandidate] = {}
+    for item in items:
+        if len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        pending[executor.submit(func, item)] = item
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result()
+
+
+def filter_by_partial_hash(
+    size_groups: Dict[int, InodeGroups],
+    executor: Executor,
+    max_workers: int = DEFAULT_WORKERS
+) -> List[HashCandidate]:
+    """
+    Return the files that can still be duplicates after comparing the first and
+    last bytes of equal-sized files. Groups of small files are passed through as is,
+    hashing them in full costs about as much as the partial hash.
+    size_groups must only hold sizes shared by two or more paths, as returned by
+    group_files_by_size.
+    """
+    candidates: List[HashCandidate] = []
+    prehash_candidates: List[HashCandidate] = []
+    for size, inode_groups in size_groups.items():
+        if size > PARTIAL_HASH_MIN_SIZE and len(inode_groups) > 1:
+            prehash_candidates.extend((size, key, paths) for key, paths in inode_groups.items())
+        else:
+            candidates.extend((size, key, paths) for key, paths in inode_groups.items())
+    
+    if prehash_candidates:
+        logging.info(f"Comparing partial hashes of {len(prehash_candidates)} large files...")
+    # Read in inode order, which mostly follows on-disk layout
+    prehash_candidates.sort(key=lambda candidate: candidate[1])
+    partial_groups: Dict[Tuple[int, bytes], List[Tuple[Tuple[int, int], List[str]]]] = defaultdict(list)
+    partial_hashes = bounded_map(
+        executor,
+        lambda candidate: calculate_partial_hash(candidate[2][0]),
+        prehash_candidates,
+        max_workers * QUEUE_DEPTH_PER_WORKER
+    )
+    for (size, key, paths), partial_hash in partial_hashes:
+        if partial_hash:
+            partial_groups[(size, partial_hash)].append((key, paths))
+    
+    for (size, _), linked_paths in partial_groups.items():
+        if sum(len(paths) for _, paths in linked_paths) > 1:
+            candidates.extend((size, key, paths) for key, paths in linked_paths)
+    
+    return candidates
+
+
+def find_duplicates_by_hash(
+    size_groups: Dict[int, InodeGroups],
+    hash_algo: str = DEFAULT_HASH_ALGO,
+    max_workers: int = DEFAULT_WORKERS,
+    hash_cache: Optional[Dict[str, bytes]] = None
+) -> List[DuplicateSet]:
+    """
+    Hash files of equal size in parallel and group by (size, hash) to find duplicates.
+    Each inode is hashed once and its hash is shared by all of its hardlinks.
+    Files are grouped on their raw digest bytes, which are cheaper to hash and
+    compare than hex strings. If hash_cache is given, every computed digest is
+    stored in it by path.
+    """
+    hash_groups: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        candidates: List[HashCandidate] = filter_by_partial_hash(
+            size_groups, executor, max_workers
+        )
+        # Largest files first, so the long hashes start early and overlap with the
+        # many short ones instead of trailing at the end (bounded_map keeps the other
+        # workers busy meanwhile). This only sets hashing order; the report is sorted
+        # separately. Within a size, files are read in (device, inode) order, which
+        # mostly follows on-disk layout and cuts seeking on spinning disks
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        logging.info(f"Hashing {len(candidates)} files using {max_workers} threads...")
+        file_hashes = bounded_map(
+            executor,
+            lambda candidate: calculate_file_hash(candidate[2][0], hash_algo),
+            candidates,
+            max_workers * QUEUE_DEPTH_PER_WORKER
+        )
+        for (size, _, paths), file_hash in file_hashes:
+            if hash_cache is not None:
+                hash_cache.update(dict.fromkeys(paths, file_hash))
             if file_hash:  # Only add if hash was successfully calculated
-                hash_groups[file_hash].append(file_path)
-        
-        # Only keep groups with multiple files (actual duplicates)
-        for file_hash, paths in hash_groups.items():
-            if len(paths) > 1:
-                items: List[DuplicateItem] = [
-                    DuplicateItem(path=path, size=size, item_type='file') 
-                    for path in paths
-                ]
-                duplicate_sets.append(DuplicateSet(
-                    hash_signature=file_hash,
-                    items=items,
-                    item_type='file'
-                ))
+                hash_groups[(size, file_hash)].extend(paths)
     
+    # Only keep groups with multiple files (actual duplicates)
+    duplicate_sets: List[DuplicateSet] = []
+    for (size, file_hash), paths in hash_groups.items():
+        if len(paths) > 1:
+            # Hashes arrive in completion order; list the paths alphabetically
+            items: List[DuplicateItem] = [
+                DuplicateItem(path=Path(path), size=size, item_type='file')
+                for path in sorted(paths)
+            ]
+            duplicate_sets.append(DuplicateSet(
+                hash_signature=file_hash.hex(),
+                items=items,
+                item_type='file'
+            ))
+    
+    # Report the largest files first, independent of hashing order
+    duplicate_sets.sort(
+        key=lambda duplicate_set: (-duplicate_set.items[0].size, duplicate_set.items[0].path)
+    )
     return duplicate_sets
 
 
-def get_directory_signature(directory_path: Path) -> Tuple[str, int]:
+def get_directory_signature(
+    files: List[FileEntry],
+    hash_algo: str = DEFAULT_HASH_ALGO,
+    hash_cache: Optional[Dict[str, bytes]] = None
+) -> Tuple[str, int]:
     """
-    Calculate a signature for a directory based on its contents.
+    Calculate a signature for a directory based on the files directly inside it.
+    File hashes are looked up in hash_cache first and added to it when computed.
     Returns a tuple of (content_hash, total_size).
     """
-    files_info: List[str] = []
+    if hash_cache is None:
+        hash_cache = {}
+    hasher = HASH_ALGORITHMS[hash_algo]()
     total_size: int = 0
     
-    try:
-        # Get all files in the directory (non-recursive)
-        files: List[Path] = [f for f in directory_path.iterdir() if f.is_file()]
-        
-        # Sort files by name for consistent ordering
-        files.sort(key=lambda x: x.name)
-        
-        for file_path in files:
-            try:
-                file_size: int = file_path.stat().st_size
-                file_hash: str = calculate_file_hash(file_path)
-                if file_hash:  # Only include if hash was successful
-                    files_info.append(f"{file_path.name}:{file_size}:{file_hash}")
-                    total_size += file_size
-            except (OSError, FileNotFoundError) as e:
-                logging.warning(f"Could not process file {file_path}: {e}")
-        
-        # Create a hash of all file information
-        content_string: str = "|".join(files_info)
-        content_hash: str = hashlib.md5(content_string.encode()).hexdigest()
-        
-        return content_hash, total_size
-        
-    except (OSError, PermissionError) as e:
-        logging.warning(f"Could not access directory {directory_path}: {e}")
-        return "", 0
+    # Sort files by name for consistent ordering
+    for entry in sorted(files, key=lambda x: x.name):
+        file_hash: Optional[bytes] = hash_cache.get(entry.path)
+        if file_hash is None:
+            file_hash = calculate_file_hash(entry.path, hash_algo)
+            hash_cache[entry.path] = file_hash
+        if file_hash:  # Only include if hash was successful
+            # Feed name, size and hash straight into the hasher; NUL can't occur
+            # in file names, so it unambiguously ends the name
+            hasher.update(os.fsencode(entry.name))
+            hasher.update(b'\0')
+            hasher.update(entry.size.to_bytes(8, 'little'))
+            hasher.update(file_hash)
+            hasher.update(b'\n')
+            total_size += entry.size
+    
+    return hasher.hexdigest(), total_size
 
 
-def find_duplicate_directories(root_path: Path) -> List[DuplicateSet]:
+def get_directory_layout_key(files: List[FileEntry]) -> str:
+    """
+    Calculate a cheap key for a directory from its file names and sizes only.
+    Directories with different keys can't have equal signatures, so only
+    directories sharing a key need their file contents hashed.
+    """
+    hasher = xxhash.xxh3_64()
+    for entry in sorted(files, key=lambda x: x.name):
+        hasher.update(os.fsencode(entry.name))
+        hasher.update(b'\0')
+        hasher.update(entry.size.to_bytes(8, 'little'))
+    return hasher.hexdigest()
+
+
+def find_duplicate_directories(
+    directory_files: Dict[str, List[FileEntry]],
+    hash_algo: str = DEFAULT_HASH_ALGO,
+    hash_cache: Optional[Dict[str, bytes]] = None
+) -> List[DuplicateSet]:
     """
     Find directories that contain exactly the same files.
+    hash_cache holds file hashes already computed by the file duplicate pass.
     Returns a list of DuplicateSet objects for duplicate directories.
     """
-    directory_signatures: Dict[str, List[Tuple[Path, int]]] = defaultdict(list)
+    if hash_cache is None:
+        hash_cache = {}
+    directory_signatures: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
     
-    try:
-        # Walk through all directories using pathlib
-        for directory_path in root_path.rglob('*'):
-            if not directory_path.is_dir():
-                continue
-            
-            # Check if directory has files (not empty)
-            has_files: bool = any(item.is_file() for item in directory_path.iterdir())
-            if not has_files:
-                continue
-            
+    # Group by names and sizes first, without reading any file contents
+    layout_groups: Dict[str, List[str]] = defaultdict(list)
+    for directory_path, files in directory_files.items():
+        layout_groups[get_directory_layout_key(files)].append(directory_path)
+    
+    for directory_paths in layout_groups.values():
+        # Skip unique layouts - they can't be duplicates
+        if len(directory_paths) < 2:
+            continue
+        
+        for directory_path in directory_paths:
             # Calculate signature for this directory
-            content_hash, total_size = get_directory_signature(directory_path)
+            content_hash, total_size = get_directory_signature(
+                directory_files[directory_path], hash_algo, hash_cache
+            )
             
             if content_hash and total_size > 0:  # Only consider directories with content
                 directory_signatures[content_hash].append((directory_path, total_size))
     
-    except (OSError, PermissionError) as e:
-        logging.error(f"Error walking directories in {root_path}: {e}")
-    
     # Convert to DuplicateSet objects
     duplicate_sets: List[DuplicateSet] = []
     for content_hash, dir_info_list in directory_signatures.items():
         if len(dir_info_list) > 1:  # Only actual duplicates
             items: List[DuplicateItem] = [
-                DuplicateItem(path=path, size=size, item_type='directory')
+                DuplicateItem(path=Path(path), size=size, item_type='directory')
                 for path, size in dir_info_list
             ]
             duplicate_sets.append(DuplicateSet(
@@ -286,6 +601,18 @@ Examples:
         action='store_true',
         help='Enable verbose output'
     )
+    parser.add_argument(
+        '--hash',
+        choices=sorted(HASH_ALGORITHMS),
+        default=DEFAULT_HASH_ALGO,
+        help=f'Content hash algorithm (default: {DEFAULT_HASH_ALGO}; md5 reproduces older file hashes)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Number of threads used for walking and hashing (default: {DEFAULT_WORKERS})'
+    )
     parser.add_argument(
         '--dirs-only',
         action='store_true',
@@ -317,7 +644,11 @@ Examples:
     if args.dirs_only and args.files_only:
         logging.error("Error: Cannot specify both --dirs-only and --files-only")
         sys.exit(1)
-    
+
+    if args.workers < 1:
+        logging.error("Error: --workers must be at least 1")
+        sys.exit(1)
+
     search_files: bool = not args.dirs_only
     search_dirs: bool = not args.files_only
     
@@ -330,23 +661,30 @@ Examples:
     logging.info(f"Searching for duplicate {' and '.join(search_type)} in: {search_path}")
     logging.info("=" * 60)
     
+    # Step 1: Walk directory tree once for both file and directory detection
+    logging.info("Step 1: Walking directory tree...")
+    files: List[FileEntry] = fast_walk(search_path, args.workers)
+    logging.info(f"Found {len(files)} total files.")
+    
+    # File hashes shared by the file and directory passes
+    hash_cache: Dict[str, bytes] = {}
+    
     # File duplicate detection
     if search_files:
-        # Step 1: Walk directory tree and group by size in single pass
-        logging.info("Step 1: Walking directory tree and grouping by size...")
-        size_groups: Dict[int, List[Path]] = walk_directory_tree_and_group_by_size(search_path)
+        size_groups: Dict[int, InodeGroups] = group_files_by_size(files)
         
-        total_files: int = sum(len(paths) for paths in size_groups.values())
-        potential_duplicates: int = sum(len(paths) for paths in size_groups.values() if len(paths) > 1)
-        size_groups_with_duplicates: int = sum(1 for paths in size_groups.values() if len(paths) > 1)
+        potential_duplicates: int = sum(count_paths(inode_groups) for inode_groups in size_groups.values())
+        size_groups_with_duplicates: int = len(size_groups)
         
-        logging.info(f"Found {total_files} total files.")
         if potential_duplicates > 0:
             logging.info(f"Found {potential_duplicates} files in {size_groups_with_duplicates} size groups that could be duplicates.")
             
             # Step 2: Hash only equal-sized files
             logging.info("\nStep 2: Calculating hashes for potential file duplicates...")
-            file_duplicates: List[DuplicateSet] = find_duplicates_by_hash(size_groups)
+            file_duplicates: List[DuplicateSet] = find_duplicates_by_hash(
+                size_groups, args.hash, args.workers,
+                hash_cache if search_dirs else None
+            )
             
             # Step 3: Report sets of duplicates
             logging.info("\nStep 3: Reporting file duplicates...")
@@ -356,11 +694,13 @@ Examples:
     
     # Directory duplicate detection
     if search_dirs:
-        step_num: str = "Step 4" if search_files else "Step 1"
+        step_num: str = "Step 4" if search_files else "Step 2"
         logging.info(f"\n{step_num}: Finding duplicate directories...")
-        directory_duplicates: List[DuplicateSet] = find_duplicate_directories(search_path)
+        directory_duplicates: List[DuplicateSet] = find_duplicate_directories(
+            group_files_by_directory(files, search_path), args.hash, hash_cache
+        )
         
-        step_num = "Step 5" if search_files else "Step 2"
+        step_num = "Step 5" if search_files else "Step 3"
         logging.info(f"\n{step_num}: Reporting directory duplicates...")
         report_duplicates(directory_duplicates)
 
@@ -1,8 +1,131 @@
+import logging
+import os
+from array import array
+from collections.abc import Iterator
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 
-from neat_fs.utils import parse_file_mode
+from neat_fs.utils import parse_file_mode, split_name
+
+# Output schema, in column order
+SCHEMA = pa.schema(
+    [
+        ('path', pa.string()),
+        ('name', pa.string()),
+        ('stem', pa.string()),
+        ('suffix', pa.string()),
+        ('parent', pa.string()),
+        ('size', pa.int64()),
+        ('mode', pa.uint32()),
+        ('type', pa.string()),
+        ('perm', pa.string()),
+        ('uid', pa.uint32()),
+        ('gid', pa.uint32()),
+        ('nlink', pa.uint64()),
+        ('inode', pa.uint64()),
+        ('is_symlink', pa.bool_()),
+        ('is_hardlink', pa.bool_()),
+        ('symlink_target', pa.string()),
+        ('created_at', pa.timestamp('ns')),
+        ('modified_at', pa.timestamp('ns')),
+        ('accessed_at', pa.timestamp('ns')),
+        ('device', pa.uint64()),
+    ]
+)
+COLUMNS = SCHEMA.names
+
+# Numeric columns are collected in typed arrays (array typecodes), the rest in lists
+ARRAY_COLUMNS = {
+    'size': 'q',
+    'mode': 'I',
+    'perm': 'H',
+    'uid': 'I',
+    'gid': 'I',
+    'nlink': 'Q',
+    'inode': 'Q',
+    'created_at': 'd',
+    'modified_at': 'd',
+    'accessed_at': 'd',
+    'device': 'Q',
+}
+
+# Collected as epoch seconds and converted to datetimes once per batch
+TIMESTAMP_COLUMNS = ['created_at', 'modified_at', 'accessed_at']
+
+# Log progress every this many indexed entries
+PROGRESS_INTERVAL = 65_536
+
+# Modes repeat heavily across a tree (mostly regular files and directories with a
+# handful of permission sets), so parse each distinct st_mode only once
+cached_parse_file_mode = lru_cache(maxsize=1024)(parse_file_mode)
+
+
+def new_batch() -> dict[str, array | list]:
+    """
+    Create empty column-wise (SoA) storage for one batch of files.
+    """
+    return {col: array(ARRAY_COLUMNS[col]) if col in ARRAY_COLUMNS else [] for col in COLUMNS}
+
+
+def batch_to_frame(batch: dict[str, array | list]) -> pd.DataFrame:
+    """
+    Build a DataFrame from a batch, wrapping the typed arrays without conversion.
+    Epoch timestamps are converted to datetimes column-wise and permission bits to
+    octal strings.
+    """
+    df = pd.DataFrame(
+        {
+            col: np.frombuffer(values, dtype=values.typecode) if isinstance(values, array) else values
+            for col, values in batch.items()
+        }
+    )
+    for col in TIMESTAMP_COLUMNS:
+        df[col] = pd.to_datetime(df[col], unit='s')
+    # Permissions are collected as ints; format the few distinct values as octal once
+    df['perm'] = df['perm'].map({perm: f'{perm:o}' for perm in df['perm'].unique()})
+    return df
+
+
+def batch_to_table(batch: dict[str, array | list]) -> pa.Table:
+    """
+    Convert a batch to an Arrow table with the index schema.
+    """
+    return pa.Table.from_pandas(batch_to_frame(batch), schema=SCHEMA, preserve_index=False)
+
+
+def open_writer(output_file: str | Path) -> pq.ParquetWriter | pa_csv.CSVWriter:
+    """
+    Open a streaming writer for the index: Parquet (zstd) for a .parquet file, else CSV.
+    """
+    if Path(output_file).suffix == '.parquet':
+        return pq.ParquetWriter(output_file, SCHEMA, compression='zstd')
+    return pa_csv.CSVWriter(output_file, SCHEMA)
+
+
+def iter_entries(directory: str, exclude_paths: set[str]) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield the DirEntry of everything below directory.
+    Symlinked directories are not descended into and excluded paths are skipped
+    together with everything below them.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if exclude_paths and os.path.normpath(entry.path) in exclude_paths:
+                    continue
+                yield entry
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_entries(entry.path, exclude_paths)
+    except PermissionError:
+        logging.warning(f'Permission error: {directory}')
+    except OSError as e:
+        logging.warning(f'Error: {e}')
 
 
 def walk_directory_tree(
@@ -13,77 +136,76 @@ def walk_directory_tree(
     hash_algo: str = 'sha1',
 ):
     """
-    Walk the directory tree and save metadata to CSV in batches.
+    Walk the directory tree and stream metadata to CSV or Parquet in batches.
+    The output file is overwritten.
     """
-    if isinstance(root_path, str):
-        root_path = Path(root_path)
-
-    files = []
-    first_batch = True
-
-    for path in root_path.rglob('*'):
-        if any(path.is_relative_to(Path(exclude_path)) for exclude_path in exclude_paths):
-            continue
-
-        print(path)
+    batch = new_batch()
+    writer = open_writer(output_file)
+    count = 0
+    excluded = {os.path.normpath(exclude_path) for exclude_path in exclude_paths}
 
+    # DirEntry caches its stat result and file type, so each entry costs one stat
+    # (none for the type checks) instead of separate stat/is_file/is_symlink calls
+    for entry in iter_entries(str(root_path), excluded):
         try:
-            s = path.stat()
+            s = entry.stat()
         except FileNotFoundError:
-            print(f'File not found: {path}')
+            logging.warning(f'File not found: {entry.path}')
             continue
         except PermissionError:
-            print(f'Permission error: {path}')
+            logging.warning(f'Permission error: {entry.path}')
             continue
         except Exception as e:
-            print(f'Error: {e}')
+            logging.warning(f'Error: {e}')
             continue
 
-        if path.is_file() or path.is_dir():
-            s = path.stat()
-            files.append(
-                {
-                    'path': path,
-                    'name': path.name,
-                    'stem': path.stem,
-                    'suffix': path.suffix,
-                    'parent': path.parent,
-                    'size': s.st_size,
-                    'mode': s.st_mode,
-                    'type': parse_file_mode(s.st_mode)[0],
-                    'perm': parse_file_mode(s.st_mode)[1],
-                    'uid': s.st_uid,
-                    'gid': s.st_gid,
-                    'nlink': s.st_nlink,
-                    'inode': s.st_ino,
-                    'is_symlink': path.is_symlink(),
-                    'is_hardlink': s.st_nlink > 1,
-                    'symlink_target': path.readlink() if path.is_symlink() else None,
-                    'created_at': pd.to_datetime(s.st_ctime, unit='s'),
-                    'modified_at': pd.to_datetime(s.st_mtime, unit='s'),
-                    'accessed_at': pd.to_datetime(s.st_atime, unit='s'),
-                    'device': s.st_dev,
-                }
-            )
+        if entry.is_file() or entry.is_dir():
+            file_type, perm = cached_parse_file_mode(s.st_mode)
+            is_symlink = entry.is_symlink()
+            stem, suffix = split_name(entry.name)
+            batch['path'].append(entry.path)
+            batch['name'].append(entry.name)
+            batch['stem'].append(stem)
+            batch['suffix'].append(suffix)
+            batch['parent'].append(os.path.dirname(entry.path))
+            batch['size'].append(s.st_size)
+            batch['mode'].append(s.st_mode)
+            batch['type'].append(file_type)
+            batch['perm'].append(perm)
+            batch['uid'].append(s.st_uid)
+            batch['gid'].append(s.st_gid)
+            batch['nlink'].append(s.st_nlink)
+            batch['inode'].append(s.st_ino)
+            batch['is_symlink'].append(is_symlink)
+            batch['is_hardlink'].append(s.st_nlink > 1)
+            batch['symlink_target'].append(os.readlink(entry.path) if is_symlink else None)
+            batch['created_at'].append(s.st_ctime)
+            batch['modified_at'].append(s.st_mtime)
+            batch['accessed_at'].append(s.st_atime)
+            batch['device'].append(s.st_dev)
+
+            count += 1
+            if count % PROGRESS_INTERVAL == 0:
+                logging.info(f'Indexed {count:,} entries')
 
             # Save batch when reaching batch_size
-            if len(files) >= batch_size:
-                df = pd.DataFrame(files)
-                df.to_csv(output_file, mode='a', header=first_batch, index=False)
-                print(f'Saved batch of {len(files)} files')
-                first_batch = False
-                files.clear()
+            if len(batch['path']) >= batch_size:
+                writer.write_table(batch_to_table(batch))
+                logging.info(f'Saved batch of {len(batch["path"])} files')
+                batch = new_batch()
 
     # Save remaining files
-    if files:
-        df = pd.DataFrame(files)
-        df.to_csv(output_file, mode='a', header=first_batch, index=False)
-        print(f'Saved final batch of {len(files)} files')
+    if batch['path']:
+        writer.write_table(batch_to_table(batch))
+        logging.info(f'Saved final batch of {len(batch["path"])} files')
+    writer.close()
 
 
 if __name__ == '__main__':
     import time
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     start_time = time.time()
     walk_directory_tree(
         '/',
@@ -94,4 +216,4 @@ if __name__ == '__main__':
     )
     end_time = time.time()
 
-    print(f'Total indexing time: {end_time - start_time:.2f} seconds')
+    logging.info(f'Total indexing time: {end_time - start_time:.2f} seconds')
@@ -1,6 +1,18 @@
 
 
-def parse_file_mode(st_mode: int) -> tuple[str, str]:
+# st_mode file type bits -> file type name
+FILE_TYPES = {
+    0o040000: 'directory',
+    0o100000: 'file',
+    0o120000: 'symlink',
+    0o060000: 'block_device',
+    0o020000: 'char_device',
+    0o010000: 'fifo',
+    0o140000: 'socket',
+}
+
+
+def parse_file_mode(st_mode: int) -> tuple[str, int]:
     """
     Parse st_mode to extract file type and permissions.
 
@@ -10,30 +22,33 @@ def parse_file_mode(st_mode: int) -> tuple[str, str]:
     Returns:
         tuple: (file_type, permissions) where:
             - file_type: 'file', 'directory', 'symlink', etc.
-            - permissions: '644', '755', etc.
+            - permissions: permission bits as an int, e.g. 0o644, 0o755
+              (format with f'{permissions:o}' for the usual '644' notation)
     """
     # Extract file type
     file_type_mask = 0o170000
     file_type_bits = st_mode & file_type_mask
+    file_type = FILE_TYPES.get(file_type_bits, 'unknown')
 
-    if file_type_bits == 0o040000:
-        file_type = "directory"
-    elif file_type_bits == 0o100000:
-        file_type = "file"
-    elif file_type_bits == 0o120000:
-        file_type = "symlink"
-    elif file_type_bits == 0o060000:
-        file_type = "block_device"
-    elif file_type_bits == 0o020000:
-        file_type = "char_device"
-    elif file_type_bits == 0o010000:
-        file_type = "fifo"
-    elif file_type_bits == 0o140000:
-        file_type = "socket"
-    else:
-        file_type = "unknown"
-
-    # Extract permissions (frist 12 bits)
-    permissions = oct(st_mode & 0o7777)[2:]
+    # Extract permissions (first 12 bits)
+    permissions = st_mode & 0o7777
 
     return file_type, permissions
+
+
+def split_name(name: str) -> tuple[str, str]:
+    """
+    Split a file name into stem and suffix, like Path.stem and Path.suffix.
+
+    Args:
+        name: The final path component, e.g. DirEntry.name
+
+    Returns:
+        tuple: (stem, suffix) where:
+            - stem: 'archive.tar' for 'archive.tar.gz', '.bashrc' for '.bashrc'
+            - suffix: '.gz' for 'archive.tar.gz', '' for '.bashrc'
+    """
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ''